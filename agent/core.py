@@ -2,6 +2,7 @@ import json
 from mistralai import Mistral
 from agent.agent_config import prompts
 from agent.agent_config import tool_schema
+from agent.history import MessageHistory
 from config import MISTRAL_API_KEY
 from tools.code_index import retrieve_context
 from tools.github_tools import fetch_github_issue, get_issue_details, post_comment
@@ -35,17 +36,19 @@ async def run_agent(issue_url: str, branch_name: str = "main") -> str:
         "role": "user",
         "content": f"Please suggest a fix on this issue {issue_url} and use {branch_name} branch for retrieving code context."
     }
-    messages = [system_message, user_message]
+    history = MessageHistory(system_message, tools)
+    history.append(user_message)
 
     while True:
         response = client.chat.complete(
             model=model,
-            messages=messages,
+            messages=history.for_request(),
             tools=tools,
             tool_choice="any",
         )
+        history.record_usage(response)
         msg = response.choices[0].message
-        messages.append(msg)
+        history.append(msg)
 
 
         if hasattr(msg, "tool_calls") and msg.tool_calls:
@@ -73,14 +76,11 @@ async def run_agent(issue_url: str, branch_name: str = "main") -> str:
                                 function_params["issue_description"] = issue_description_cache
                                 function_result = names_to_functions[function_name](**function_params)
 
-                    messages.append({
-                        "role": "tool",
-                        "tool_call_id": tool_call.id,
-                        "content": str(function_result)
-                    })
+                    history.append_tool_result(tool_call.id, function_name, str(function_result))
 
                     if function_name == "post_comment":
                         print("OpenSorus (final): ✅ Comment posted successfully. No further action needed.")
+                        print(f"[Usage] Total: {history.total_usage()}")
                         return "Task Completed"
 
                 else:
@@ -89,7 +89,7 @@ async def run_agent(issue_url: str, branch_name: str = "main") -> str:
                         f"Error: Tool '{function_name}' is not available. "
                         "You can only use the following tools: fetch_github_issue, get_issue_details, post_comment."
                     )
-                    messages.append({
+                    history.append({
                         "role": "tool",
                         "tool_call_id": tool_call.id,
                         "content": tool_error_msg
@@ -100,4 +100,5 @@ async def run_agent(issue_url: str, branch_name: str = "main") -> str:
         else:
             print("OpenSorus (final):", msg.content)
             break
+    print(f"[Usage] Total: {history.total_usage()}")
     return "Task Completed"
\ No newline at end of file
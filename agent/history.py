@@ -0,0 +1,128 @@
+import json
+from typing import Any, Dict, List
+from llama_index.core.utils import get_tokenizer
+
+
+PROMPT_TOKEN_BUDGET = 12000
+KEEP_RECENT_TOOL_OUTPUTS = 1
+SUMMARY_CHARS = 300
+
+_tokenizer = None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Counts tokens with llama_index's default tiktoken tokenizer, not Mistral's,
+    so budgets built on it are only approximate.
+    """
+    global _tokenizer
+    if _tokenizer is None:
+        _tokenizer = get_tokenizer()
+    return len(_tokenizer(text)) if text else 0
+
+
+def _message_text(message: Any) -> str:
+    if isinstance(message, dict):
+        return str(message.get("content") or "")
+
+    text = str(getattr(message, "content", None) or "")
+    for tool_call in getattr(message, "tool_calls", None) or []:
+        text += tool_call.function.name + str(tool_call.function.arguments)
+    return text
+
+
+class MessageHistory:
+    """
+    Keeps the agent conversation within a prompt-token budget.
+
+    The system prompt and tool schemas stay fixed at the front so they can be prefix-cached.
+    When the history grows past the budget, the largest older tool outputs are truncated to a
+    short excerpt. Token counts are approximate, see `count_tokens`.
+    """
+
+    def __init__(
+        self,
+        system_message: Dict[str, str],
+        tools: List[Dict[str, Any]],
+        budget_tokens: int = PROMPT_TOKEN_BUDGET,
+        keep_recent_tool_outputs: int = KEEP_RECENT_TOOL_OUTPUTS,
+    ):
+        self.messages = [system_message]
+        self.budget_tokens = budget_tokens
+        self.keep_recent_tool_outputs = keep_recent_tool_outputs
+        self.fixed_tokens = count_tokens(system_message["content"]) + count_tokens(json.dumps(tools))
+        self.usage = []
+        self._tokens = [0]
+        self._tool_names = {}
+        self._compacted = set()
+
+    def append(self, message: Any):
+        self.messages.append(message)
+        self._tokens.append(count_tokens(_message_text(message)))
+
+    def append_tool_result(self, tool_call_id: str, name: str, content: str):
+        self._tool_names[len(self.messages)] = name
+        self.append({
+            "role": "tool",
+            "tool_call_id": tool_call_id,
+            "content": content,
+        })
+
+    def prompt_tokens(self) -> int:
+        return self.fixed_tokens + sum(self._tokens)
+
+    def _compact(self, position: int):
+        """
+        Truncates a tool output to a short excerpt, keeping it only if that saves tokens.
+        """
+        self._compacted.add(position)
+        message = self.messages[position]
+        excerpt = message["content"][:SUMMARY_CHARS].strip()
+        content = (
+            f"[Output of `{self._tool_names[position]}` truncated from {self._tokens[position]} tokens]\n"
+            f"{excerpt}..."
+        )
+        tokens = count_tokens(content)
+        if tokens < self._tokens[position]:
+            message["content"] = content
+            self._tokens[position] = tokens
+
+    def for_request(self) -> List[Any]:
+        """
+        Returns the messages to send on the next turn, truncating the largest older tool
+        outputs first until the prompt fits the budget. Truncation is permanent so the prefix
+        only changes when the budget is exceeded.
+        """
+        tool_positions = sorted(self._tool_names)
+        if self.keep_recent_tool_outputs:
+            tool_positions = tool_positions[:-self.keep_recent_tool_outputs]
+        tool_positions.sort(key=lambda position: self._tokens[position], reverse=True)
+
+        for position in tool_positions:
+            if self.prompt_tokens() <= self.budget_tokens:
+                break
+            if position not in self._compacted:
+                self._compact(position)
+
+        if self.prompt_tokens() > self.budget_tokens:
+            print(f"[History] Prompt still over budget after truncation: {self.prompt_tokens()} > {self.budget_tokens} tokens.")
+        return self.messages
+
+    def record_usage(self, response: Any):
+        usage = getattr(response, "usage", None)
+        if usage is None:
+            return
+        turn = {
+            "turn": len(self.usage) + 1,
+            "prompt_tokens": usage.prompt_tokens,
+            "completion_tokens": usage.completion_tokens,
+        }
+        self.usage.append(turn)
+        print(f"[Usage] Turn {turn['turn']}: prompt_tokens={turn['prompt_tokens']}, completion_tokens={turn['completion_tokens']}")
+
+    def total_usage(self) -> Dict[str, int]:
+        return {
+            "turns": len(self.usage),
+            "prompt_tokens": sum(turn["prompt_tokens"] for turn in self.usage),
+            "completion_tokens": sum(turn["completion_tokens"] for turn in self.usage),
+        }
@@ -1,10 +1,13 @@
 import os
+import tempfile
 from dotenv import load_dotenv
 
 load_dotenv()
 
 MISTRAL_API_KEY = os.getenv("MISTRAL_API_KEY")
 APP_ID = os.getenv("APP_ID")
+DOC_PREP_WORKERS = int(os.getenv("DOC_PREP_WORKERS", min(4, (os.cpu_count() or 1) // 2)))
+IMPORT_GRAPH_CACHE_DIR = os.getenv("IMPORT_GRAPH_CACHE_DIR", os.path.join(tempfile.gettempdir(), "opensorus", "import_graph"))
 APP_PRIVATE_KEY = os.getenv("APP_PRIVATE_KEY", "").encode().decode("unicode_escape").strip()
 
 lines = [line.strip() for line in APP_PRIVATE_KEY.strip().split('\\n') if line.strip()]
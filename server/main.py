@@ -1,8 +1,13 @@
 from fastapi import FastAPI, HTTPException
 from agent.core import run_agent
+from tools.doc_prep import shutdown_doc_prep_pool
 
 app = FastAPI()
 
+@app.on_event("shutdown")
+def shutdown():
+    shutdown_doc_prep_pool()
+
 @app.post('/webhook')
 async def check_payload(payload: dict):
     if "action" in payload:
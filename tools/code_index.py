@@ -4,17 +4,21 @@ import os
 from sklearn.metrics.pairwise import cosine_similarity
 import time
 from typing import List, Dict
-from llama_index.core import VectorStoreIndex, Document, Settings, get_response_synthesizer
+from llama_index.core import VectorStoreIndex, Settings, get_response_synthesizer
 from llama_index.core.query_engine import RetrieverQueryEngine
 from llama_index.core.postprocessor import SimilarityPostprocessor
 from llama_index.embeddings.mistralai import MistralAIEmbedding
 from llama_index.llms.mistralai import MistralAI
 from mistralai import Mistral
-from config import MISTRAL_API_KEY
-from tools.utils import fetch_repo_files, fetch_file_content
+from config import MISTRAL_API_KEY, DOC_PREP_WORKERS
+from tools.doc_prep import batch_nodes_by_tokens, prepare_nodes
+from tools.import_graph import GRAPH_EXTENSIONS, ImportGraph, load_import_graph, save_import_graph
+from tools.utils import fetch_repo_archive, fetch_repo_files, fetch_file_blob, resolve_commit_sha
 
 
 INCLUDE_FILE_EXTENSIONS = {".py", ".js", ".ts", ".json", ".md", ".txt"}
+RELATED_FILE_BUDGET = 8
+EMBED_QUEUE_SIZE = 4
 
 def safe_normalize(vec: np.ndarray) -> np.ndarray:
     vec = np.nan_to_num(vec, nan=0.0, posinf=0.0, neginf=0.0)
@@ -93,38 +97,102 @@ async def async_retry_on_429(func, *args, max_retries=3, delay=1, **kwargs):
             else:
                 raise
 
+async def get_import_graph(owner: str, repo: str, commit_sha: str) -> ImportGraph:
+    graph = load_import_graph(owner, repo, commit_sha)
+    if graph is not None:
+        print(f"[Indexing] Loaded cached import graph for {owner}/{repo} at commit {commit_sha}.")
+        return graph
+
+    files = await async_retry_on_429(fetch_repo_archive, owner, repo, commit_sha, extensions=GRAPH_EXTENSIONS)
+    sources = {path: content.decode("utf-8", errors="ignore") for path, content in files.items()}
+    graph = await asyncio.to_thread(ImportGraph.build, sources)
+    try:
+        save_import_graph(owner, repo, commit_sha, graph)
+    except OSError as e:
+        print(f"[Warning] Failed to cache import graph for {owner}/{repo} at commit {commit_sha}: {e}")
+    print(f"[Indexing] Built import graph for {owner}/{repo} with {len(graph.edges)} importing files.")
+    return graph
+
 async def build_repo_index(owner: str, repo: str, ref: str = "main", issue_description: str = "") -> VectorStoreIndex:
     model_name = "codestral-embed"
     embed_model = MistralAIEmbedding(model_name=model_name, api_key=MISTRAL_API_KEY)
     print(f"[Indexing] Starting to index repository: {owner}/{repo} at ref {ref}...")
 
+    # Pin the ref to one commit so the file list, import graph and file contents all agree.
+    ref = await async_retry_on_429(resolve_commit_sha, owner, repo, ref)
     file_paths = await async_retry_on_429(fetch_repo_files, owner, repo, ref)
 
     if issue_description:
-        file_paths = select_relevant_files_semantic(issue_description, file_paths)  # stays sync unless heavy
+        seed_files = select_relevant_files_semantic(issue_description, file_paths)  # stays sync unless heavy
+        try:
+            graph = await get_import_graph(owner, repo, ref)
+            file_paths = graph.expand(seed_files, RELATED_FILE_BUDGET, extensions=INCLUDE_FILE_EXTENSIONS)
+            print(f"[Indexing] Expanded {len(seed_files)} seed files to {len(file_paths)} along the import graph.")
+        except Exception as e:
+            print(f"[Warning] Import graph unavailable, using seed files only: {e}")
+            file_paths = seed_files
 
-    documents = []
+    fetched_paths = []
 
-    for path in file_paths:
-        _, ext = os.path.splitext(path)
-        if ext.lower() not in INCLUDE_FILE_EXTENSIONS:
-            continue
+    async def fetch_blobs():
+        for path in file_paths:
+            _, ext = os.path.splitext(path)
+            if ext.lower() not in INCLUDE_FILE_EXTENSIONS:
+                continue
 
-        try:
-            content = await async_retry_on_429(fetch_file_content, owner, repo, path, ref)
-            documents.append(Document(text=content, metadata={"file_path": path}))
+            try:
+                blob = await async_retry_on_429(fetch_file_blob, owner, repo, path, ref)
+            except Exception as e:
+                print(f"[Warning] Skipping file {path} due to error: {e}")
+                continue
+
+            fetched_paths.append(path)
             print(f"[Indexing] Added file: {path}")
+            yield path, blob
             await asyncio.sleep(0.1)
-        except Exception as e:
-            print(f"[Warning] Skipping file {path} due to error: {e}")
 
+    async def embed_nodes(nodes):
+        await asyncio.to_thread(index.insert_nodes, nodes)
+
+    # Fetching and preparation feed a bounded queue that a separate task drains into the embedder,
+    # so new files keep being fetched and prepared while earlier batches are embedding.
+    queue = asyncio.Queue(maxsize=EMBED_QUEUE_SIZE)
+
+    async def produce():
+        # The end-of-stream sentinel is only sent when the consumer is still draining;
+        # on cancellation the consumer has already stopped and a full queue would block forever.
+        try:
+            async for nodes in prepare_nodes(fetch_blobs(), workers=DOC_PREP_WORKERS):
+                for batch in batch_nodes_by_tokens(nodes):
+                    await queue.put(batch)
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            await queue.put(None)
+            raise
+        await queue.put(None)
+
+    async def consume():
+        while True:
+            batch = await queue.get()
+            if batch is None:
+                return
+            await async_retry_on_429(embed_nodes, batch)
+
+    index = VectorStoreIndex(nodes=[], embed_model=embed_model)
+    producer = asyncio.create_task(produce())
     try:
-        index = await async_retry_on_429(VectorStoreIndex.from_documents, documents, embed_model=embed_model)
+        await consume()
+        await producer
     except Exception as e:
         print(f"[Error] Failed to build index due to: {e}")
         raise
+    finally:
+        if not producer.done():
+            producer.cancel()
+            await asyncio.gather(producer, return_exceptions=True)
 
-    print(f"[Indexing] Finished indexing {len(documents)} files.")
+    print(f"[Indexing] Finished indexing {len(fetched_paths)} files.")
     return index
 
 
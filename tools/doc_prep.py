@@ -0,0 +1,166 @@
+import asyncio
+import base64
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from typing import AsyncIterable, AsyncIterator, Iterable, List, Optional, Tuple, Union
+from llama_index.core import Document
+from llama_index.core.node_parser import SentenceSplitter
+from llama_index.core.schema import BaseNode
+from llama_index.core.utils import get_tokenizer
+from config import DOC_PREP_WORKERS
+
+
+CHUNK_SIZE = 1024
+CHUNK_OVERLAP = 200
+FILES_PER_TASK = 64
+BYTES_PER_TASK = 256 * 1024
+POOL_MIN_BYTES = 64 * 1024
+EMBED_BATCH_TOKENS = 16384
+
+FileBlob = Tuple[str, str]
+
+_pool: Optional[ProcessPoolExecutor] = None
+_pool_workers = 0
+
+# Per-process caches, built lazily inside each pool worker.
+_splitter = None
+_tokenizer = None
+
+
+def get_doc_prep_pool(workers: int = DOC_PREP_WORKERS) -> Optional[ProcessPoolExecutor]:
+    """
+    Returns the shared process pool for document preparation.
+    With one worker or fewer, returns None so work runs on the default thread pool instead.
+    Workers are started with forkserver, since forking a server that already runs threads can deadlock.
+    A pool broken by a dead worker (e.g. an OOM kill) is replaced rather than reused.
+    """
+    global _pool, _pool_workers
+    if workers <= 1:
+        return None
+    if _pool is not None and getattr(_pool, "_broken", False):
+        print("[Warning] Document preparation pool is broken, starting a new one.")
+        _pool.shutdown(wait=False)
+        _pool = None
+    if _pool is None or _pool_workers != workers:
+        if _pool is not None:
+            _pool.shutdown(wait=False)
+        _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("forkserver"))
+        _pool_workers = workers
+    return _pool
+
+
+def shutdown_doc_prep_pool():
+    global _pool, _pool_workers
+    if _pool is not None:
+        _pool.shutdown()
+        _pool = None
+        _pool_workers = 0
+
+
+def normalize_text(text: str) -> str:
+    text = text.replace("\r\n", "\n").replace("\r", "\n").replace("\x00", "")
+    return text.strip()
+
+
+def _prepare_file(path: str, blob: str) -> List[BaseNode]:
+    global _splitter, _tokenizer
+    if _splitter is None:
+        _splitter = SentenceSplitter(chunk_size=CHUNK_SIZE, chunk_overlap=CHUNK_OVERLAP)
+        _tokenizer = get_tokenizer()
+
+    text = normalize_text(base64.b64decode(blob).decode("utf-8", errors="ignore"))
+    if not text:
+        return []
+
+    document = Document(
+        text=text,
+        metadata={"file_path": path},
+        excluded_embed_metadata_keys=["token_count"],
+        excluded_llm_metadata_keys=["token_count"],
+    )
+    nodes = _splitter.get_nodes_from_documents([document])
+    for node in nodes:
+        node.metadata["token_count"] = len(_tokenizer(node.get_content()))
+    return nodes
+
+
+def _prepare_batch(files: List[FileBlob]) -> List[BaseNode]:
+    nodes = []
+    for path, blob in files:
+        try:
+            nodes.extend(_prepare_file(path, blob))
+        except Exception as e:
+            print(f"[Warning] Skipping file {path} during preparation due to error: {e}")
+    return nodes
+
+
+async def _aiter(files: Union[Iterable[FileBlob], AsyncIterable[FileBlob]]) -> AsyncIterator[FileBlob]:
+    if hasattr(files, "__aiter__"):
+        async for item in files:
+            yield item
+    else:
+        for item in files:
+            yield item
+
+
+async def prepare_nodes(
+    files: Union[Iterable[FileBlob], AsyncIterable[FileBlob]],
+    workers: int = DOC_PREP_WORKERS,
+    files_per_task: int = FILES_PER_TASK,
+    bytes_per_task: int = BYTES_PER_TASK,
+) -> AsyncIterator[List[BaseNode]]:
+    """
+    Decodes, normalizes, splits and token-counts (path, base64 content) pairs on a process pool.
+    Files are grouped into tasks of up to files_per_task files or bytes_per_task bytes, so large files
+    are submitted as soon as they arrive. Tasks smaller than POOL_MIN_BYTES run on the default thread
+    pool instead, where the process hop and pickling would cost more than the work itself.
+    Yields lists of ready nodes as soon as each task finishes, while files are still arriving.
+    """
+    loop = asyncio.get_running_loop()
+    pool = get_doc_prep_pool(workers)
+    pending = set()
+    batch = []
+    batch_bytes = 0
+
+    def submit(files_batch, size):
+        executor = pool if size >= POOL_MIN_BYTES else None
+        pending.add(loop.run_in_executor(executor, _prepare_batch, files_batch))
+
+    async for item in _aiter(files):
+        batch.append(item)
+        batch_bytes += len(item[1])
+        if len(batch) >= files_per_task or batch_bytes >= bytes_per_task:
+            submit(batch, batch_bytes)
+            batch = []
+            batch_bytes = 0
+
+        done = {future for future in pending if future.done()}
+        for future in done:
+            pending.discard(future)
+            yield future.result()
+
+    if batch:
+        submit(batch, batch_bytes)
+
+    for future in asyncio.as_completed(pending):
+        yield await future
+
+
+def batch_nodes_by_tokens(nodes: List[BaseNode], max_tokens: int = EMBED_BATCH_TOKENS) -> List[List[BaseNode]]:
+    """
+    Groups nodes into batches whose combined token count stays within max_tokens.
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+    for node in nodes:
+        tokens = node.metadata.get("token_count", 0)
+        if current and current_tokens + tokens > max_tokens:
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(node)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
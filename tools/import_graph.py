@@ -0,0 +1,222 @@
+import ast
+import json
+import os
+import posixpath
+import re
+import sys
+import tempfile
+from collections import defaultdict
+from typing import Dict, List, Optional, Set
+from config import IMPORT_GRAPH_CACHE_DIR
+
+
+PYTHON_EXTENSIONS = {".py"}
+JS_EXTENSIONS = {".js", ".jsx", ".mjs", ".cjs", ".ts", ".tsx"}
+GRAPH_EXTENSIONS = PYTHON_EXTENSIONS | JS_EXTENSIONS
+
+JS_RESOLVE_SUFFIXES = [""] + sorted(JS_EXTENSIONS) + [f"/index{ext}" for ext in sorted(JS_EXTENSIONS)]
+
+JS_IMPORT_PATTERN = re.compile(
+    r"""(?:\bimport\s+(?:[\w*{}\s,$]+\s+from\s+)?|\bexport\s+[\w*{}\s,$]+\s+from\s+|\brequire\s*\(\s*|\bimport\s*\(\s*)['"]([^'"]+)['"]"""
+)
+PY_IMPORT_PATTERN = re.compile(r"^\s*(?:from\s+(\.*[\w.]*)\s+import\s+([\w.,\s*]+)|import\s+([\w.,\s]+))", re.MULTILINE)
+
+
+def _python_module_names(source: str) -> List[tuple]:
+    """
+    Returns (level, module, names) tuples for every import in a Python source file.
+    Falls back to a regex scan when the file does not parse.
+    """
+    imports = []
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        for match in PY_IMPORT_PATTERN.finditer(source):
+            if match.group(3):
+                for name in match.group(3).split(","):
+                    imports.append((0, name.strip().split(" ")[0], []))
+            else:
+                module = match.group(1)
+                level = len(module) - len(module.lstrip("."))
+                names = [name.strip().split(" ")[0] for name in match.group(2).split(",")]
+                imports.append((level, module.lstrip("."), names))
+        return imports
+
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            for alias in node.names:
+                imports.append((0, alias.name, []))
+        elif isinstance(node, ast.ImportFrom):
+            imports.append((node.level, node.module or "", [alias.name for alias in node.names]))
+    return imports
+
+
+class ImportGraph:
+    """
+    Static dependency graph between source files of a repository.
+    `edges` maps a file to the files it imports; `reverse_edges` maps a file to the files importing it.
+    """
+
+    def __init__(self, edges: Optional[Dict[str, List[str]]] = None):
+        self.edges = {path: sorted(targets) for path, targets in (edges or {}).items()}
+        self.reverse_edges = defaultdict(list)
+        for path, targets in self.edges.items():
+            for target in targets:
+                self.reverse_edges[target].append(path)
+
+    @classmethod
+    def build(cls, files: Dict[str, str]) -> "ImportGraph":
+        """
+        Builds the graph from a mapping of file path to source text.
+        Only Python and JS/TS files are parsed; imports that do not resolve to a repo file are dropped.
+        """
+        paths = set(files)
+        py_modules = {}
+        for path in paths:
+            if os.path.splitext(path)[1].lower() in PYTHON_EXTENSIONS:
+                module = path[:-3].replace("/", ".")
+                if module.endswith(".__init__"):
+                    module = module[:-len(".__init__")]
+                py_modules[module] = path
+
+        # Also index modules by their name relative to the nearest non-package directory, for layouts
+        # such as src/<package>/... where the import root is not the repo root. Only unambiguous
+        # aliases are kept, exact module names always win, and single names shadowing the
+        # standard library (json, logging, types, ...) are never aliased.
+        packages = {posixpath.dirname(path) for path in paths if posixpath.basename(path) == "__init__.py"}
+        aliases = defaultdict(set)
+        for module, path in py_modules.items():
+            parts = module.split(".")
+            root = len(parts) - 1
+            while root > 0 and "/".join(parts[:root]) in packages:
+                root -= 1
+            if root == 0:
+                continue
+            alias = ".".join(parts[root:])
+            if "." not in alias and alias in sys.stdlib_module_names:
+                continue
+            aliases[alias].add(path)
+        for alias, alias_paths in aliases.items():
+            if alias not in py_modules and len(alias_paths) == 1:
+                py_modules[alias] = alias_paths.pop()
+
+        edges = {}
+        for path, source in files.items():
+            ext = os.path.splitext(path)[1].lower()
+            if ext in PYTHON_EXTENSIONS:
+                targets = cls._resolve_python(path, source, py_modules)
+            elif ext in JS_EXTENSIONS:
+                targets = cls._resolve_js(path, source, paths)
+            else:
+                continue
+            targets.discard(path)
+            if targets:
+                edges[path] = targets
+        return cls(edges)
+
+    @staticmethod
+    def _resolve_python(path: str, source: str, py_modules: Dict[str, str]) -> Set[str]:
+        targets = set()
+        package_parts = path.split("/")[:-1]
+        for level, module, names in _python_module_names(source):
+            if level:
+                base_parts = package_parts[:len(package_parts) - (level - 1)] if level - 1 <= len(package_parts) else []
+                base = ".".join(base_parts + ([module] if module else []))
+            else:
+                base = module
+            if not base:
+                continue
+
+            resolved_names = False
+            for name in names:
+                target = py_modules.get(f"{base}.{name}") if name != "*" else None
+                if target:
+                    targets.add(target)
+                    resolved_names = True
+            if not resolved_names:
+                target = py_modules.get(base)
+                if target:
+                    targets.add(target)
+        return targets
+
+    @staticmethod
+    def _resolve_js(path: str, source: str, paths: Set[str]) -> Set[str]:
+        targets = set()
+        directory = posixpath.dirname(path)
+        for specifier in JS_IMPORT_PATTERN.findall(source):
+            # Bare specifiers refer to packages, not files in the repo.
+            if not specifier.startswith("."):
+                continue
+            base = posixpath.normpath(posixpath.join(directory, specifier))
+            for suffix in JS_RESOLVE_SUFFIXES:
+                if base + suffix in paths:
+                    targets.add(base + suffix)
+                    break
+        return targets
+
+    def neighbors(self, path: str) -> List[str]:
+        return self.edges.get(path, []) + sorted(self.reverse_edges.get(path, []))
+
+    def expand(self, seeds: List[str], max_files: int, extensions: Optional[Set[str]] = None) -> List[str]:
+        """
+        Breadth-first expansion from the seed files along import edges, imports before importers,
+        stopping once max_files files have been selected. Seeds are always kept.
+        Files outside `extensions` are walked through but not selected, so they do not use up the budget.
+        """
+        selected = list(dict.fromkeys(seeds))
+        seen = set(selected)
+        frontier = list(selected)
+        while frontier and len(selected) < max_files:
+            next_frontier = []
+            for path in frontier:
+                for neighbor in self.neighbors(path):
+                    if neighbor in seen:
+                        continue
+                    seen.add(neighbor)
+                    next_frontier.append(neighbor)
+                    if extensions is not None and os.path.splitext(neighbor)[1].lower() not in extensions:
+                        continue
+                    selected.append(neighbor)
+                    if len(selected) >= max_files:
+                        return selected
+            frontier = next_frontier
+        return selected
+
+    def to_dict(self) -> Dict[str, Dict[str, List[str]]]:
+        return {"edges": self.edges}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Dict[str, List[str]]]) -> "ImportGraph":
+        return cls(data.get("edges", {}))
+
+
+def _cache_path(owner: str, repo: str, commit_sha: str) -> str:
+    return os.path.join(IMPORT_GRAPH_CACHE_DIR, f"{owner}__{repo}__{commit_sha}.json")
+
+
+def load_import_graph(owner: str, repo: str, commit_sha: str) -> Optional[ImportGraph]:
+    path = _cache_path(owner, repo, commit_sha)
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path) as f:
+            return ImportGraph.from_dict(json.load(f))
+    except (OSError, ValueError) as e:
+        print(f"[Warning] Ignoring unreadable import graph cache {path}: {e}")
+        return None
+
+
+def save_import_graph(owner: str, repo: str, commit_sha: str, graph: ImportGraph):
+    path = _cache_path(owner, repo, commit_sha)
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    # A unique temp file per writer lets concurrent runs for the same commit save without clobbering each other.
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            json.dump(graph.to_dict(), f)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
@@ -1,10 +1,11 @@
 import asyncio
-import base64
 from datetime import datetime, timezone, timedelta
 import jwt
+import os
+import tarfile
 import threading
 import time
-from typing import List
+from typing import Dict, List, Optional, Set
 import requests
 from config import APP_ID, APP_PRIVATE_KEY
 
@@ -94,6 +95,25 @@ def get_installation_token(installation_id):
 
 # print(get_installation_token(69452220))
 
+async def resolve_commit_sha(owner: str, repo: str, ref: str = "main") -> str:
+    """
+    Resolves a branch, tag or SHA to the commit SHA it currently points to.
+    """
+    installation_id = await asyncio.to_thread(get_installation_id, owner, repo)
+    token = await asyncio.to_thread(get_installation_token, installation_id)
+    url = f"https://api.github.com/repos/{owner}/{repo}/commits/{ref}"
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Accept": "application/vnd.github.sha"
+    }
+
+    response = await asyncio.to_thread(github_request, "GET", url, headers=headers)
+    if response.status_code != 200:
+        raise Exception(f"Failed to resolve ref {ref}: {response.status_code} {response.text}")
+
+    return response.text.strip()
+
+
 async def fetch_repo_files(owner: str, repo: str, ref: str = "main") -> List[str]:
     """
     Lists all files in the repository by recursively fetching the Git tree from GitHub API.
@@ -117,9 +137,10 @@ async def fetch_repo_files(owner: str, repo: str, ref: str = "main") -> List[str
 
 # print(fetch_repo_files("aditi-dsi", "EvalAI-Starters", "master"))
 
-async def fetch_file_content(owner: str, repo: str, path: str, ref: str = "main") -> str:
+async def fetch_file_blob(owner: str, repo: str, path: str, ref: str = "main") -> str:
     """
-    Fetches the content of a file from the GitHub repository.
+    Fetches the raw base64-encoded content of a file from the GitHub repository.
+    Decoding is left to the caller so it can happen off the event loop.
     """
     installation_id = get_installation_id(owner, repo)
     token = await asyncio.to_thread(get_installation_token, installation_id)
@@ -134,9 +155,42 @@ async def fetch_file_content(owner: str, repo: str, path: str, ref: str = "main"
     if response.status_code != 200:
         raise Exception(f"Failed to fetch file content {path}: {response.status_code} {response.text}")
 
-    content_json = response.json()
-    content = base64.b64decode(content_json["content"]).decode("utf-8", errors="ignore")
-    return content
+    return response.json()["content"]
+
 
-# print(fetch_file_content("aditi-dsi", "testing-cryptope", "frontend/src/lib/buildSwap.ts", "main"))
+def _download_repo_archive(url: str, headers: Dict[str, str], extensions: Optional[Set[str]], max_file_bytes: int) -> Dict[str, bytes]:
+    response = github_request("GET", url, headers=headers, stream=True)
+    with response:
+        if response.status_code != 200:
+            raise Exception(f"Failed to download repository archive: {response.status_code} {response.text}")
+
+        files = {}
+        response.raw.decode_content = True
+        with tarfile.open(fileobj=response.raw, mode="r|gz") as archive:
+            for member in archive:
+                if not member.isfile() or member.size > max_file_bytes:
+                    continue
+                # Archive entries are prefixed with a single "<owner>-<repo>-<sha>/" directory.
+                path = member.name.split("/", 1)[-1]
+                if extensions is not None and os.path.splitext(path)[1].lower() not in extensions:
+                    continue
+                files[path] = archive.extractfile(member).read()
+    return files
+
+
+async def fetch_repo_archive(owner: str, repo: str, ref: str = "main", extensions: Optional[Set[str]] = None, max_file_bytes: int = 1_000_000) -> Dict[str, bytes]:
+    """
+    Downloads the repository tarball for a ref in a single streamed request.
+    Returns a mapping of file path to raw content, optionally filtered by extension.
+    Download and extraction both run off the event loop.
+    """
+    installation_id = get_installation_id(owner, repo)
+    token = await asyncio.to_thread(get_installation_token, installation_id)
+
+    url = f"https://api.github.com/repos/{owner}/{repo}/tarball/{ref}"
+    headers = {
+        "Authorization": f"Bearer {token}",
+        "Accept": "application/vnd.github.v3+json"
+    }
 
+    return await asyncio.to_thread(_download_repo_archive, url, headers, extensions, max_file_bytes)